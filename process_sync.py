@@ -12,7 +12,7 @@
 #   Department of Software Technology
 #   De La Salle University
 
-# Through the use of multiple synchronization design patterns (e.g., lightswitch, turnstile, and multiplexer),
+# Through the use of a monitor (a mutex lock paired with condition variables) that admits threads in phases,
 # this program presents a deadlock- and starvation-free solution to this process synchronization problem:
 #   - There are n slots inside the fitting room of a department store. Thus, there can only be at most
 #     n persons (threads) inside the fitting room at a time.
@@ -22,8 +22,12 @@
 #     by choosing a random duration in the interval [SLEEP_MIN / SLEEP_DIVISOR, SLEEP_MAX / SLEEP_DIVISOR).
 
 # Some notes on terminology:
-#   - For the semaphore operations, Python uses the terms "acquire" and "release" in place of "wait" (P)
-#     and "signal" (V), respectively. This program's documentation uses these terms interchangeably.
+#   - For the condition variable operations, Python uses the term "notify" in place of "signal". This
+#     program's documentation uses these terms interchangeably.
+#   - When run with the --mp option, each blue or green "thread" is carried out by a separate process
+#     instead, with the synchronization objects and shared variables taken from the multiprocessing module.
+#     This bypasses the global interpreter lock at the cost of interprocess communication, and only pays
+#     off if fit_clothes() is replaced with actual computation.
 
 
 # -----------
@@ -31,6 +35,14 @@
 # -----------
 
 import threading
+import multiprocessing
+import array
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import argparse
+import sys
+import io
+import os
 import time
 import random
 
@@ -49,340 +61,460 @@ SLEEP_DIVISOR = 100
 BLUE = "Blue"
 GREEN = "Green"
 
+# Constant mapping each color to the integer representing it in the shared state of the fitting room monitor
+COLOR_CODE = {BLUE: 0, GREEN: 1}
 
-# -------------------
-#   UTILITY METHODS  
-# -------------------
-
-# Thread-safe version of the built-in print() function
-lock = threading.Lock()
-def safe_print(*args, **kwargs):
-    # Thread safety is provided through the use of a mutex lock.
-    with lock:
-        print(*args, **kwargs)
-
-# Method that suspends the execution of the current thread for a randomized duration
-# (under the pretext that the thread is "fitting clothes" inside the fitting room)
-def fit_clothes():
-    # The randomization simulates the arbitrary duration for which a thread can stay inside the fitting room.
-    time.sleep(random.randrange(SLEEP_MIN, SLEEP_MAX) / SLEEP_DIVISOR)
+# Constants corresponding to the indices of the shared variables in room_state
+THREAD_ID = 0           # ID of the most recent thread to enter the fitting room
+ROOM_CTR = 1            # Number of threads in the fitting room
+ROOM_STATE_SIZE = 2
 
+# Constants corresponding to the events displayed by the logger thread
+EVT_ENTER = 0           # Entry of a thread into the fitting room
+EVT_FIRST_ENTER = 1     # Entry of the first thread into an empty fitting room
+EVT_EXIT = 2            # Exit of a thread from the fitting room
+EVT_LAST_EXIT = 3       # Exit of the last thread, leaving the fitting room empty
 
-# --------------------------
-#   INITIAL INPUT & OUTPUT   
-# --------------------------
+# Constant corresponding to the message templates of the events, indexed by event
+# The blue and green threads only put the event, the thread ID, and the color in the queue.
+# The messages are formatted by the logger thread, outside of any critical section.
+ENTER_MESSAGE = "Thread ID: {0}\nColor: {1}\n\n"
+EXIT_MESSAGE = "Thread {0} exits the fitting room.\n\n"
+MESSAGES = (
+    ENTER_MESSAGE,
+    "----- {1} Only -----\n\n" + ENTER_MESSAGE,
+    EXIT_MESSAGE,
+    EXIT_MESSAGE + ">> Empty Fitting Room\n\n"
+)
 
-safe_print("### OS Process Synchronization ###\n")
+# Constants corresponding to the maximum size of a batch of messages written by the logger thread
+MAX_BATCH_EVENTS = 100
+MAX_BATCH_BYTES = 64 * 1024
 
-num_slots = int(input("Enter the number of slots inside the fitting room: "))
-if num_slots <= 0:
-    raise Exception("The number of slots should be positive.")
+# Constant corresponding to the maximum number of worker processes that ProcessPoolExecutor allows on Windows
+MAX_WINDOWS_PROCESSES = 61
 
-num_blue = int(input("Enter the number of blue threads: "))
-if num_blue < 0:
-    raise Exception("The number of blue threads should be nonnegative.")
-
-num_green = int(input("Enter the number of green threads: "))
-if num_green < 0:
-    raise Exception("The number of green threads should be nonnegative.")
-
-if num_blue == 0 and num_green == 0:
-    raise Exception("No threads to synchronize!")
-
-safe_print()
 
+# -------------------
+#   UTILITY METHODS  
+# -------------------
 
-# -----------------------
-#   LIGHTSWITCH PATTERN
-# -----------------------
+# Method corresponding to the activity of the logger thread
+# The logger thread is the only thread that writes to the standard output while the blue and green
+# threads are running. It stops after displaying the events put in the queue before the sentinel None.
+
+# Since no other thread writes to the standard output in the meantime, the logger thread bypasses the
+# buffering and locking of sys.stdout and writes the encoded messages directly to its file descriptor,
+# in batches of at most MAX_BATCH_EVENTS events or MAX_BATCH_BYTES bytes. If the standard output is not
+# backed by a file descriptor (e.g., if sys.stdout has been replaced), it falls back to sys.stdout.write().
+# @param fd    File descriptor of the standard output (None if there is none)
+def logger_func(fd):
+    # When writing to the file descriptor, the messages are encoded the same way sys.stdout would have
+    # (including the translation of newlines to os.linesep, e.g., "\r\n" on Windows) so that they match
+    # the initial output. Otherwise, sys.stdout.write() takes care of this.
+    if fd is None:
+        templates = MESSAGES
+        encoding = "utf-8"
+    else:
+        templates = tuple(template.replace("\n", os.linesep) for template in MESSAGES)
+        encoding = sys.stdout.encoding
+
+    done = False
+
+    while not done:
+        # Block until an event arrives, then collect the other events already in the queue
+        # so that they are written to the standard output at once.
+        buf = bytearray()
+        num_events = 0
+        item = log_q.get()
+
+        while True:
+            # The sentinel is put in the queue only after all the blue and green threads terminate.
+            # Therefore, it is always the last event.
+            if item is None:
+                done = True
+                break
+
+            event, tid, color = item
+            buf += templates[event].format(tid, color).encode(encoding)
+            num_events += 1
+
+            if num_events == MAX_BATCH_EVENTS or len(buf) >= MAX_BATCH_BYTES or log_q.empty():
+                break
+
+            item = log_q.get()
+
+        if fd is None:
+            sys.stdout.write(buf.decode(encoding))
+            sys.stdout.flush()
+            continue
+
+        # A single call to os.write() may write only part of the batch (e.g., if the standard output
+        # is a pipe).
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(fd, view):]
 
-# Class implementing the lightswitch synchronization design pattern
+# Method that suspends the execution of the current thread for a randomized duration
+# (under the pretext that the thread is "fitting clothes" inside the fitting room)
+# @param duration    Duration (in seconds) of the thread's stay inside the fitting room
+def fit_clothes(duration):
+    time.sleep(duration)
+
+
+# ------------------------
+#   FITTING ROOM MONITOR
+# ------------------------
+
+# Class implementing the fitting room as a monitor (a mutex lock paired with condition variables)
+
+# This replaces the lightswitch pattern (one lightswitch per color, each guarded by its own binary semaphore),
+# the binary semaphore that prevents blue and green threads from mixing, the multiplexer pattern (one
+# counting semaphore per color), and the turnstile pattern. Instead of passing through these semaphores one
+# after the other, a thread acquires the monitor's mutex once, checks whether it is allowed to enter the
+# fitting room, and, if not, sleeps on a condition variable (releasing the mutex) until a thread exits.
+
+# Starvation is prevented through phase tickets. The threads are grouped into phases of a single color,
+# which are served one after the other:
+#   - An arriving thread joins the phase being served if it is of the same color and no thread of the
+#     other color is waiting. Otherwise, it joins the next phase of its color, opening one if needed.
+#   - Therefore, a thread waits for at most one phase of the other color, and a long line of blue threads
+#     cannot enter the fitting room ahead of a green thread that arrived before them (or the other way around).
+#   - At most three phases are pending at a time: the phase being served and one queued phase per color.
+#     Each of them has its own condition variable so that the threads sleeping on a condition variable can
+#     all proceed once their phase is served.
+
+# The variables of the monitor are kept in a single array of C integers so that they sit next to each other
+# in memory and can be shared by processes when the program is run with the --mp option.
+class FittingRoom:
+
+    # Number of phases that can be pending at the same time
+    NUM_PHASES = 3
+
+    # Indices of the variables of the monitor in its state
+    IN_ROOM = 0                             # Number of threads occupying a slot inside the fitting room
+    SERVING = 1                             # Ticket of the phase whose threads are allowed to enter
+    LATEST = 2                              # Ticket of the most recently opened phase
+    PHASE_COLOR = 3                         # Color of each pending phase
+    PHASE_SIZE = 3 + NUM_PHASES             # Number of threads holding the ticket of each pending phase that
+                                            # have not yet exited
+    STATE_SIZE = 3 + 2 * NUM_PHASES
 
-# This pattern allows a thread of one type to block threads of other types while still providing
-# concurrent access for threads of the same type. In this particular problem, this is used to block
-# green threads if a blue thread is in the fitting room while allowing other blue threads to enter
-# (or the other way around).
-class Lightswitch:
-    
     # Constructor
-    # @param color    Color of the thread invoking this lightswitch
-    def __init__(self, color):
-        self.counter = 0                        # Number of threads that invoked this lightswitch but have not finished
-                                                # execution
-        self.color = color                      # Color of the thread invoking this lightswitch
-        self.mutex = threading.Semaphore(1)     # Binary semaphore to ensure atomicity of this lightswitch's methods
+    # @param num_slots    Number of slots inside the fitting room
+    # @param sync         Module providing the synchronization objects (threading or multiprocessing)
+    # @param state        Zero-filled array of STATE_SIZE integers holding the variables of the monitor
+    def __init__(self, num_slots, sync, state):
+        self.num_slots = num_slots              # Number of slots inside the fitting room
+        self.state = state                      # Variables of the monitor
+        self.state[FittingRoom.LATEST] = -1
+        self.mutex = sync.Lock()                # Mutex lock to ensure atomicity of this monitor's methods
+        self.conds = [                          # Condition variables on which the threads of each phase sleep
+            sync.Condition(self.mutex) for _ in range(FittingRoom.NUM_PHASES)
+        ]
+
+    # Method that returns the ticket of the phase that an arriving thread joins
+    # The pending phases are indexed by their tickets modulo NUM_PHASES. This method should only be invoked
+    # while holding the mutex.
+    # @param color    Integer representing the color of the arriving thread
+    def take_ticket(self, color):
+        state = self.state
+        serving = state[FittingRoom.SERVING]
+        latest = state[FittingRoom.LATEST]
+
+        # Join the queued phase of the same color, if any.
+        for ticket in range(serving + 1, latest + 1):
+            if state[FittingRoom.PHASE_COLOR + ticket % FittingRoom.NUM_PHASES] == color:
+                return ticket
+
+        # If no phase is queued, join the phase being served if it is of the same color.
+        if latest == serving and state[FittingRoom.PHASE_COLOR + serving % FittingRoom.NUM_PHASES] == color:
+            return serving
+
+        # Otherwise, open a new phase. If the fitting room is idle, this phase is served immediately.
+        latest += 1
+        state[FittingRoom.LATEST] = latest
+        state[FittingRoom.PHASE_COLOR + latest % FittingRoom.NUM_PHASES] = color
+        return latest
 
     # Method corresponding to the entry of a thread into the fitting room
-    # @param blue_green_mutex    Binary semaphore that prevents blue and green threads from mixing in the fitting room
-    def lock(self, blue_green_mutex):
-        # Ensure atomicity by acquiring mutex.
-        self.mutex.acquire()
-
-        # If mutex is acquired, allow the thread's entry into the fitting room.
-        self.counter += 1
-
-        # If it is the first thread to enter the fitting room, block threads of the other color
-        # while still allowing threads of the same color to enter.
-        if self.counter == 1:
-            blue_green_mutex.acquire()
-
-        # Release mutex.
-        self.mutex.release()
+    # @param color    Color of the thread entering the fitting room
+    def enter(self, color):
+        state = self.state
+        with self.mutex:
+            ticket = self.take_ticket(COLOR_CODE[color])
+            phase = ticket % FittingRoom.NUM_PHASES
+            state[FittingRoom.PHASE_SIZE + phase] += 1
+
+            # The number of slots and the condition variable of the phase do not change while the thread
+            # waits. Hence, they are looked up only once.
+            num_slots = self.num_slots
+            cond = self.conds[phase]
+
+            # Block the thread until its phase is served and a slot is free. Since the mutex is already held,
+            # the limit on the number of slots is enforced by a plain integer comparison instead of a counting
+            # semaphore (multiplexer).
+            while ticket != state[FittingRoom.SERVING] or state[FittingRoom.IN_ROOM] == num_slots:
+                cond.wait()
+
+            state[FittingRoom.IN_ROOM] += 1
 
     # Method corresponding to the exit of a thread from the fitting room
-    # @param blue_green_mutex    Binary semaphore 
-    def unlock(self, blue_green_mutex):
-        # Ensure atomicity by acquiring mutex.
-        self.mutex.acquire()
-
-        # If the mutex is acquired, allow the thread's exit from the fitting room.
-        self.counter -= 1
-
-        # If it is the last thread to exit the fitting room, release the lock that blocks threads
-        # of the other color from entering.
-        if self.counter == 0:
-            blue_green_mutex.release()
-
-        # Release mutex.
-        self.mutex.release()
+    def exit(self):
+        state = self.state
+        with self.mutex:
+            state[FittingRoom.IN_ROOM] -= 1
+            phase = state[FittingRoom.SERVING] % FittingRoom.NUM_PHASES
+            state[FittingRoom.PHASE_SIZE + phase] -= 1
+
+            # If it is the last thread of its phase, serve the next phase. Since the fitting room is now empty,
+            # wake up only as many of its threads as there are slots instead of all of them; each of these
+            # threads wakes up another one when it exits.
+            if state[FittingRoom.PHASE_SIZE + phase] == 0:
+                state[FittingRoom.SERVING] += 1
+                phase = state[FittingRoom.SERVING] % FittingRoom.NUM_PHASES
+                self.conds[phase].notify(min(state[FittingRoom.PHASE_SIZE + phase], self.num_slots))
+
+            # Otherwise, wake up exactly one of the threads of the same phase waiting for the freed slot.
+            else:
+                self.conds[phase].notify()
+
+
+# Class implementing the fitting room for the case in which all the threads are of the same color
+
+# Since the threads cannot mix colors, the only restriction is the number of slots. Thus, the phases of the
+# FittingRoom class are skipped altogether, and the fitting room is reduced to the multiplexer pattern: a
+# single counting semaphore whose value is the number of free slots. This class has the same methods as the
+# FittingRoom class so that the threads do not need to know which of the two they use.
+class SingleColorRoom:
 
+    # Constructor
+    # @param num_slots    Number of slots inside the fitting room
+    # @param sync         Module providing the synchronization objects (threading or multiprocessing)
+    def __init__(self, num_slots, sync):
+        self.multiplexer = sync.BoundedSemaphore(num_slots)
 
-# ----------------------------------------------------------
-#   SEMAPHORES, SYNCHRONIZATION OBJECTS & SHARED VARIABLES
-# ----------------------------------------------------------
+    # Method corresponding to the entry of a thread into the fitting room
+    # @param color    Color of the thread entering the fitting room
+    def enter(self, color):
+        self.multiplexer.acquire()
 
-# Binary semaphore that prevents blue and green threads from mixing in the fitting room
-blue_green_mutex = threading.Semaphore(1)             
+    # Method corresponding to the exit of a thread from the fitting room
+    def exit(self):
+        self.multiplexer.release()
 
-# Binary semaphore for the implementation of the turnstile synchronization design pattern
-# In this particular problem, this is used to block all incoming threads if a green thread arrives
-# while blue threads are in the fitting room:
-#   - This prevents the scenario wherein a long line of blue threads accumulates while a green thread
-#     is waiting and these blue threads are able to enter the fitting room before the green thread.
-#   - Therefore, this guarantees that the solution is starvation-free.
-turnstile = threading.Semaphore(1) 
 
-# Instantiations of the lightswitch synchronization design pattern
-# Refer to the documentation of the Lightswitch class for an explanation of this design pattern.
-blue_in_room = Lightswitch(BLUE)
-green_in_room = Lightswitch(GREEN)
+# ----------------------------------------------
+#   SYNCHRONIZATION OBJECTS & SHARED VARIABLES
+# ----------------------------------------------
 
-# Binary semaphores for the implementation of the multiplexer synchronization design pattern
-# In this particular problem, these are used to impose the limit on the number of (concurrent) threads
-# of the same color that can enter the fitting room.
-num_allowed_blue = threading.Semaphore(num_slots)
-num_allowed_green = threading.Semaphore(num_slots)
+# These are created by the main thread once the input has been read and are assigned to the variables below
+# through init_shared_variables(). When the program is run with the --mp option, every worker process also
+# invokes init_shared_variables() upon starting, as module-level variables are not shared by processes.
 
-# ID of the current thread
-# The nth thread to enter the fitting room is assigned the ID n.
-thread_id = 0
+# Instantiation of the fitting room monitor
+# Refer to the documentation of the FittingRoom and SingleColorRoom classes for an explanation of this monitor.
+fitting_room = None
 
-# Number of threads in the fitting room
-room_ctr = 0
+# Array of the shared integer variables of the threads, indexed by THREAD_ID and ROOM_CTR
+#   - The nth thread to enter the fitting room is assigned the ID n.
+#   - ROOM_CTR holds the number of threads in the fitting room.
+room_state = None
 
 # Mutex lock that ensures the atomicity of selected operations in a thread's activity
-# Refer to the documentation of blue_thread_func() and green_thread_func() for the particulars
-# of these operations.
-room_mutex = threading.Lock()
+# Refer to the documentation of thread_func() for the particulars of these operations.
+room_mutex = None
+
+# Queue of the events to be displayed by the logger thread
+# Instead of writing to the standard output while holding room_mutex, threads only put their events
+# (tuples of the event, the thread ID, and the color) in this queue, keeping the formatting and the slow
+# write out of the critical section. Putting an event in this queue does not block.
+log_q = None
+
+# Method that assigns the synchronization objects and shared variables to be used by the current process
+# @param room     Fitting room monitor
+# @param state    Array of the shared integer variables of the threads
+# @param mutex    Mutex lock that ensures the atomicity of selected operations in a thread's activity
+# @param q        Queue of the events to be displayed by the logger thread
+def init_shared_variables(room, state, mutex, q):
+    global fitting_room, room_state, room_mutex, log_q
+    fitting_room = room
+    room_state = state
+    room_mutex = mutex
+    log_q = q
 
 
 # ---------------------------
 #   THREAD TARGET FUNCTIONS
 # ---------------------------
 
-# Method corresponding to the activity of a blue thread
-def blue_thread_func():
-    # Provide access to the shared variables.
-    global thread_id, room_ctr
-
-    # Use the turnstile and lightswitch synchronization design patterns to prevent starvation
-    # and allow multiple blue threads to concurrently enter the fitting room while blocking
-    # green threads:
-    #   - Once a blue thread acquires the turnstile while blue threads are in the fitting room,
-    #     the lightswitch blue_in_room will "waitlist" its entry. It is the job of the num_allowed_blue
-    #     multiplexer to block its entry if the fittign room is full.
-    #   - Once a green thread acquires the turnstile while blue threads are in the fitting room,
-    #     the lightswitch blue_in_room will block this thread. Therefore, the turnstile will not
-    #     be released as long as this thread is blocked, effectively blocking all incoming threads
-    #     and preventing starvation.
-    turnstile.acquire()
-    blue_in_room.lock(blue_green_mutex)
-    turnstile.release()
-
-    # Following the multiplexer pattern, decrement the number of blue threads that can enter the
-    # fitting room. If the value of this counting semaphore drops to 0, then acquiring it will
-    # block that acquiring thread.
-
-    # As opposed to this releasing this num_allowed_blue semaphore, note that acquiring it should
-    # not be inside any mutex lock. Waiting on a semaphore inside a mutex lock is a well-known
-    # deadlock pattern, as a thread blocking on this semaphore will prevent the mutex lock from
-    # being released.
-    num_allowed_blue.acquire()
+# Method corresponding to the activity of a blue or green thread
+# Both colors share the same activity, differing only in the color passed to the fitting room monitor
+# and displayed in the messages.
+# @param color       Color of the thread
+# @param duration    Duration (in seconds) of the thread's stay inside the fitting room
+def thread_func(color, duration):
+    # Enter the fitting room through the monitor, which blocks the thread while threads of the other
+    # color are in the fitting room or while the fitting room is full. Refer to the documentation of the
+    # FittingRoom class for the particulars.
+    fitting_room.enter(color)
 
     # Local variable for storing the ID of the current thread
     current_thread_id = None
 
-    # To prevent other blue threads in the fitting room from interleaving and possibly resulting
+    # To prevent other threads in the fitting room from interleaving and possibly resulting
     # in the IDs, counters, and display messages to be out of sync, ensure the atomicity of the
     # following sequence of operations:
     #   - Incrementing the thread ID
-    #   - Incrementing the number of threads in the fitting room
-    #   - Displaying the message associated with the entry of the first thread into an empty
-    #     fitting room
     #   - Setting the thread ID of the current active thread
-    #   - Displaying the message associated with the entry of a thread
-    with room_mutex:
-        thread_id += 1
-        room_ctr += 1
-
-        # Display the message associated with the entry of the first thread into an empty fitting room.
-        if room_ctr == 1:
-            safe_print(f"----- {BLUE} Only -----\n")
-
-        current_thread_id = thread_id
-
-        # Display the message associated with the entry of a thread.
-        safe_print(f"Thread ID: {current_thread_id}\nColor: {BLUE}\n")
-
-    # Simulate the stay of the blue thread inside the fitting room for an arbitrary duration.
-    fit_clothes()
-
-    # To prevent other blue threads in the fitting room from interleaving and possibly resulting
-    # in the IDs, counters, and display messages to be out of sync, ensure the atomicity of the
-    # following sequence of operations:
-    #   - Incrementing the counting semaphore denoting the number of blue threads that can enter
-    #     the fitting room
-    #   - Decrementing the number of threads in the fitting room
-    #   - Displaying the message associated with the exit of a thread
-    #   - Displaying the message associated with an empty fitting room
-    
-    # The room_mutex lock (instead of creating a new lock) is used in order to ensure that the
-    # number of threads in the fitting room is first incremented (room_ctr += 1) before it is
-    # decremented (room_ctr -= 1), preventing it from assuming an illogical negative value.
-    with room_mutex:
-        num_allowed_blue.release()
-        room_ctr -= 1
-
-        # Display the message associated with the exit of a thread.
-        # This allows the user to track the threads in the fitting room.
-        safe_print(f"Thread {current_thread_id} exits the fitting room.\n")
-
-        # Display the message associated with an empty fitting room.
-        if room_ctr == 0:
-            safe_print(">> Empty Fitting Room\n")
-
-    # Invoke the unlock() method of the blue threads' lightswitch.
-    blue_in_room.unlock(blue_green_mutex)
-
-
-# Method corresponding to the activity of a green thread
-def green_thread_func():
-    # Provide access to the shared variables.
-    global thread_id, room_ctr
-
-    # Use the turnstile and lightswitch synchronization design patterns to prevent starvation
-    # and allow multiple blue threads to concurrently enter the fitting room while blocking
-    # green threads:
-    
-    #   - Once a green thread acquires the turnstile while green threads are in the fitting room,
-    #     the lightswitch green_in_room will "waitlist" its entry. It is the job of the num_allowed_blue
-    #     multiplexer to block its entry if the fittign room is full.
-    
-    #   - Once a blue thread acquires the turnstile while green threads are in the fitting room,
-    #     the lightswitch green_in_room will block this thread. Therefore, the turnstile will not
-    #     be released as long as this thread is blocked, effectively blocking all incoming threads
-    #     and preventing starvation.
-    turnstile.acquire()
-    green_in_room.lock(blue_green_mutex)
-    turnstile.release()
-
-    # Following the multiplexer pattern, decrement the number of green threads that can enter the
-    # fitting room. If the value of this counting semaphore drops to 0, then acquiring it will
-    # block that acquiring thread.
-
-    # As opposed to this releasing this num_allowed_green semaphore, note that acquiring it should
-    # not be inside any mutex lock. Waiting on a semaphore inside a mutex lock is a well-known
-    # deadlock pattern, as a thread blocking on this semaphore will prevent the mutex lock from
-    # being released.
-    num_allowed_green.acquire()
-
-    # Local variable for storing the ID of the current thread
-    current_thread_id = None
-
-    # To prevent other green threads in the fitting room from interleaving and possibly resulting
-    # in the IDs, counters, and display messages to be out of sync, ensure the atomicity of the
-    # following sequence of operations:
-    #   - Incrementing the thread ID
     #   - Incrementing the number of threads in the fitting room
-    #   - Displaying the message associated with the entry of the first thread into an empty
-    #     fitting room
-    #   - Setting the thread ID of the current active thread
-    #   - Displaying the message associated with the entry of a thread
+    #   - Displaying the message associated with the entry of a thread (and, if it is the first
+    #     thread to enter an empty fitting room, the header of the fitting room)
     with room_mutex:
-        thread_id += 1
-        room_ctr += 1
-
-        # Display the message associated with the entry of the first thread into an empty fitting room.
-        if room_ctr == 1:
-            safe_print(f"----- {GREEN} Only -----\n")
+        room_state[THREAD_ID] += 1
+        current_thread_id = room_state[THREAD_ID]
+        room_state[ROOM_CTR] += 1
 
-        current_thread_id = thread_id
+        # Display the message associated with the entry of a thread, preceded by the header of the fitting
+        # room if it is the first thread to enter, as a single event.
+        if room_state[ROOM_CTR] == 1:
+            log_q.put((EVT_FIRST_ENTER, current_thread_id, color))
+        else:
+            log_q.put((EVT_ENTER, current_thread_id, color))
 
-        # Display the message associated with the entry of a thread.
-        safe_print(f"Thread ID: {current_thread_id}\nColor: {GREEN}\n")
+    # Simulate the stay of the thread inside the fitting room for an arbitrary duration.
+    fit_clothes(duration)
 
-    # Simulate the stay of the green thread inside the fitting room for an arbitrary duration.
-    fit_clothes()
-
-    # To prevent other green threads in the fitting room from interleaving and possibly resulting
+    # To prevent other threads in the fitting room from interleaving and possibly resulting
     # in the IDs, counters, and display messages to be out of sync, ensure the atomicity of the
     # following sequence of operations:
-    #   - Incrementing the counting semaphore denoting the number of blue threads that can enter
-    #     the fitting room
     #   - Decrementing the number of threads in the fitting room
-    #   - Displaying the message associated with the exit of a thread
-    #   - Displaying the message associated with an empty fitting room
-    
-    # The room_mutex lock (instead of creating a new lock) is used in order to ensure that the
-    # number of threads in the fitting room is first incremented (room_ctr += 1) before it is
-    # decremented (room_ctr -= 1), preventing it from assuming an illogical negative value.
+    #   - Displaying the message associated with the exit of a thread (and, if it is the last
+    #     thread to exit, the message associated with an empty fitting room)
+
+    # Putting the event in the queue cannot be moved out of room_mutex. Otherwise, a thread of the
+    # same color could enter the fitting room after the last thread decrements the counter but before
+    # the latter displays its message, resulting in the empty fitting room being displayed after the
+    # entry of a thread that is still inside.
     with room_mutex:
-        num_allowed_green.release()
-        room_ctr -= 1
+        room_state[ROOM_CTR] -= 1
 
-        # Display the message associated with the exit of a thread.
+        # Display the message associated with the exit of a thread, followed by the message associated
+        # with an empty fitting room if it is the last thread to exit, as a single event.
         # This allows the user to track the threads in the fitting room.
-        safe_print(f"Thread {current_thread_id} exits the fitting room.\n")
+        if room_state[ROOM_CTR] == 0:
+            log_q.put((EVT_LAST_EXIT, current_thread_id, color))
+        else:
+            log_q.put((EVT_EXIT, current_thread_id, color))
 
-        # Display the message associated with an empty fitting room.
-        if room_ctr == 0:
-            safe_print(">> Empty Fitting Room\n")
+    # Exit the fitting room through the monitor only after the exit messages have been displayed
+    # so that they precede the messages of the threads allowed to enter in its stead.
+    fitting_room.exit()
 
-    # Invoke the unlock() method of the green threads' lightswitch.
-    green_in_room.unlock(blue_green_mutex)
-            
 
 # ---------------
 #   MAIN THREAD
 # ---------------
 
-# Create the blue and green threads.
-threads = []
-for _ in range(num_blue):
-    thread = threading.Thread(target = blue_thread_func)
-    threads.append(thread)
-
-for _ in range(num_green):
-    thread = threading.Thread(target = green_thread_func)
-    threads.append(thread)
-
-# Shuffle the threads to randomize the order of their execution.
-random.shuffle(threads)
-
-# Start the activities of all the blue and green threads.
-for thread in threads:
-    thread.start()
-
-# Block the main thread until all the blue and green threads terminate.
-for thread in threads:
-    thread.join()
+# The activity of the main thread is guarded so that it is not carried out again by the worker processes
+# when the program is run with the --mp option (the worker processes may import this module anew).
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "OS Process Synchronization")
+    parser.add_argument("--mp", action = "store_true",
+                        help = "carry out the blue and green threads as separate processes")
+    args = parser.parse_args()
+
+    # Display the initial output and read the input.
+    print("### OS Process Synchronization ###\n")
+
+    num_slots = int(input("Enter the number of slots inside the fitting room: "))
+    if num_slots <= 0:
+        raise Exception("The number of slots should be positive.")
+
+    num_blue = int(input("Enter the number of blue threads: "))
+    if num_blue < 0:
+        raise Exception("The number of blue threads should be nonnegative.")
+
+    num_green = int(input("Enter the number of green threads: "))
+    if num_green < 0:
+        raise Exception("The number of green threads should be nonnegative.")
+
+    if num_blue == 0 and num_green == 0:
+        raise Exception("No threads to synchronize!")
+
+    print()
+
+    # Create the synchronization objects and shared variables, taking them from the multiprocessing
+    # module if the blue and green threads are to be carried out as separate processes.
+
+    # The shared integer variables are packed into arrays of C integers (instead of being separate integer
+    # objects scattered across the heap) so that the variables guarded by the same mutex lock sit next to
+    # each other in memory.
+    if args.mp:
+        sync = multiprocessing
+        room_vars = multiprocessing.RawArray("i", FittingRoom.STATE_SIZE)
+        state = multiprocessing.RawArray("i", ROOM_STATE_SIZE)
+        q = multiprocessing.SimpleQueue()
+    else:
+        sync = threading
+        room_vars = array.array("i", [0] * FittingRoom.STATE_SIZE)
+        state = array.array("i", [0] * ROOM_STATE_SIZE)
+        q = queue.SimpleQueue()
+
+    # If all the threads are of the same color, there is nothing to keep from mixing in the fitting room.
+    # Refer to the documentation of the SingleColorRoom class for the particulars.
+    if num_blue == 0 or num_green == 0:
+        room = SingleColorRoom(num_slots, sync)
+    else:
+        room = FittingRoom(num_slots, sync, room_vars)
+
+    shared_variables = (room, state, sync.Lock(), q)
+    init_shared_variables(*shared_variables)
+
+    # Create and start the logger thread. Since it writes directly to the file descriptor of the standard
+    # output, the initial output still buffered in sys.stdout is flushed beforehand.
+    sys.stdout.flush()
+    try:
+        stdout_fd = sys.stdout.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        stdout_fd = None
+
+    logger = threading.Thread(target = logger_func, args = (stdout_fd,), daemon = True)
+    logger.start()
+
+    # List the colors of the blue and green threads.
+    tasks = [BLUE] * num_blue + [GREEN] * num_green
+
+    # Shuffle the threads to randomize the order of their execution. Only the colors are shuffled (references
+    # to the same two strings); no thread objects are created or moved around.
+    random.shuffle(tasks)
+
+    # Choose the durations of the threads' stay inside the fitting room in advance. The randomization simulates
+    # the arbitrary duration for which a thread can stay inside the fitting room. Doing this in the main thread
+    # keeps the blue and green threads from contending for the lock of the random number generator.
+    durations = [random.randrange(SLEEP_MIN, SLEEP_MAX) / SLEEP_DIVISOR for _ in range(num_blue + num_green)]
+
+    # Carry out the activities of all the blue and green threads on a fixed pool of worker threads (or worker
+    # processes) instead of creating one thread per activity. Since at most num_slots threads can be inside
+    # the fitting room, twice this number of workers is enough to keep the fitting room full while threads
+    # are waiting to enter. The pool is further capped:
+    #   - At the number of threads, as additional workers would have nothing to carry out (worker processes
+    #     may all be started up front).
+    #   - At MAX_WINDOWS_PROCESSES for worker processes on Windows, where ProcessPoolExecutor rejects more.
+    num_workers = min(2 * num_slots, len(tasks))
+    if args.mp:
+        if sys.platform == "win32":
+            num_workers = min(num_workers, MAX_WINDOWS_PROCESSES)
+
+        executor = ProcessPoolExecutor(max_workers = num_workers, initializer = init_shared_variables,
+                                       initargs = shared_variables)
+    else:
+        executor = ThreadPoolExecutor(max_workers = num_workers)
+
+    with executor:
+        # Block the main thread until all the blue and green threads terminate.
+        list(executor.map(thread_func, tasks, durations))
+
+    # Stop the logger thread once it has displayed all the messages of the blue and green threads.
+    log_q.put(None)
+    logger.join()